@@ -12,12 +12,37 @@ For each post, adds:
 
 import os
 import json
+import hashlib
+import sqlite3
 import argparse
+import asyncio
 import time
-from typing import Dict, Any
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
 
+import tiktoken
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import (
+    AsyncOpenAI,
+    OpenAI,
+    APIConnectionError,
+    APITimeoutError,
+    BadRequestError,
+    InternalServerError,
+    RateLimitError,
+)
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+try:
+    # Optional: much faster (de)serialization of large post dumps
+    import orjson
+except ImportError:
+    orjson = None
 
 # ================================
 # ENV & CLIENT
@@ -28,93 +53,255 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise RuntimeError("OPENAI_API_KEY is not set in .env")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+
+# ================================
+# CLASSIFICATION CACHE (SQLite)
+# ================================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, "db")
+os.makedirs(DB_PATH, exist_ok=True)
+DB_FILE = os.path.join(DB_PATH, "ig_posts.db")
+
+
+def open_cache_db():
+    """
+    One connection per classification run, shared by every task. Cache writes
+    are committed once by the caller, not per post.
+    """
+    conn = sqlite3.connect(DB_FILE)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def init_cache_db(conn):
+    c = conn.cursor()
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS classify_cache (
+            key TEXT PRIMARY KEY,
+            response_json TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
+        """
+    )
+    conn.commit()
+
+
+def cache_key(model: str, mode: str, cleaned: str) -> str:
+    return hashlib.sha256(f"{model}|{mode}|{cleaned}".encode("utf-8")).hexdigest()
+
+
+def load_cached_classification(conn, key: str) -> Optional[Dict[str, Any]]:
+    row = conn.execute(
+        "SELECT response_json FROM classify_cache WHERE key = ?", (key,)
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def save_cached_classification(conn, key: str, classification: Dict[str, Any]):
+    # No commit here: the caller commits the whole run at once
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO classify_cache (key, response_json, created_at) "
+            "VALUES (?, ?, datetime('now'))",
+            (key, json.dumps(classification, ensure_ascii=False)),
+        )
+    except Exception as e:
+        print("[DB ERROR]", e)
 
 
 # ================================
 # HELPERS
 # ================================
-def clean_text_for_model(text: str) -> str:
+# Instagram footer junk: everything from the earliest marker on is dropped
+CUT_MARKERS = (
+    "More posts from",
+    "About Blog Jobs Help",
+    "Instagram from",
+    "Uploading & Non-Users",
+    "Privacy Terms",
+    "Meta ©",
+)
+
+# Basic mode only needs sentiment + themes: also drop the comment section
+# (these usually separate caption from comments) and use a smaller budget
+BASIC_CUT_MARKERS = CUT_MARKERS + ("View all", "Liked by")
+BASIC_MAX_LEN = 800
+PRO_MAX_LEN = 4000
+
+
+def load_json(path: str) -> Any:
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def dump_json(path: str, data: Any):
+    if orjson is not None:
+        # Writes UTF-8 bytes directly (same as ensure_ascii=False)
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def clean_text_for_model(text: str, mode: str = "basic") -> str:
     """
     Clean raw_text to something more manageable for the model:
-    - Strip huge Instagram footer junk.
-    - Trim to max length (e.g. 4000 chars) to avoid token explosion.
+    - Strip huge Instagram footer junk (and, in basic mode, the comments).
+    - Trim to max length (800 chars basic / 4000 pro) to avoid token explosion.
     """
     if not text:
         return ""
 
-    # Cut at "More posts from" etc if present
-    cut_markers = [
-        "More posts from",
-        "About Blog Jobs Help",
-        "Instagram from",
-        "Uploading & Non-Users",
-        "Privacy Terms",
-        "Meta ©",
-    ]
-    for marker in cut_markers:
-        if marker in text:
-            text = text.split(marker)[0]
-
-    # Trim to 4000 chars max
-    max_len = 4000
+    if mode == "basic":
+        cut_markers, max_len = BASIC_CUT_MARKERS, BASIC_MAX_LEN
+    else:
+        cut_markers, max_len = CUT_MARKERS, PRO_MAX_LEN
+
+    # Cut at the earliest "More posts from" etc if present (one slice, no splits)
+    cut_at = min((i for i in (text.find(m) for m in cut_markers) if i >= 0), default=-1)
+    if cut_at >= 0:
+        text = text[:cut_at]
+
+    # Trim to max length
     if len(text) > max_len:
         text = text[:max_len] + " ... [TRUNCATED]"
 
     return text.strip()
 
 
-def classify_single_post(
-    post: Dict[str, Any],
-    model: str = "gpt-4o-mini",
-    mode: str = "basic",
-) -> Dict[str, Any]:
+def post_text_for_model(post: Dict[str, Any], mode: str = "basic") -> str:
     """
-    Call OpenAI once for a single post and return a small dict:
-    {
-      "sentiment": "...",
-      "themes": [...],
-      "key_comments": [...],
-      "insight": "..."
-    }
+    Pick the text of a scraped post to send to the model.
+    Basic mode uses the separate "caption" field when the scraper found a
+    non-empty one (raw_text then joins caption + comments with no marker to
+    cut at); otherwise (no caption, older dumps, article fallback) and in pro
+    mode, raw_text is used.
     """
-    raw_text = post.get("raw_text", "") or ""
-    cleaned = clean_text_for_model(raw_text)
+    if mode == "basic" and post.get("caption"):
+        return clean_text_for_model(post["caption"], mode)
+    return clean_text_for_model(post.get("raw_text", "") or "", mode)
 
-    if not cleaned:
-        return {
-            "sentiment": "mixed",
-            "themes": ["no_text"],
-            "key_comments": [],
-            "insight": "No caption or comments were available for this post.",
-        }
 
-    # ============================
-    # SYSTEM PROMPT (MODE-AWARE)
-    # ============================
+def estimate_request_tokens(model: str, system_msg: str, user_msg: str, max_tokens: int) -> int:
+    """
+    Rough upper bound of the tokens a request will consume against the TPM
+    limit: prompt tokens + the completion budget.
+    """
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        prompt_tokens = len(encoding.encode(system_msg + user_msg))
+    except Exception:
+        # tiktoken fetches encodings on first use; offline, fall back to ~4 chars/token
+        prompt_tokens = len(system_msg + user_msg) // 4
+    return prompt_tokens + max_tokens
+
+
+# ================================
+# RATE LIMITING
+# ================================
+@dataclass
+class RateLimiter:
+    """
+    Token-bucket throttle for OpenAI RPM/TPM limits.
+
+    Both buckets refill continuously at max_rpm/60 and max_tpm/60 per second;
+    acquire() waits only as long as needed for both to cover the request.
+    """
+    max_rpm: float
+    max_tpm: float
+    rpm_capacity: float = field(init=False)
+    tpm_capacity: float = field(init=False)
+    last_refill: float = field(default_factory=time.monotonic)
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def __post_init__(self):
+        self.rpm_capacity = self.max_rpm
+        self.tpm_capacity = self.max_tpm
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self.last_refill
+        self.rpm_capacity = min(self.max_rpm, self.rpm_capacity + elapsed * self.max_rpm / 60.0)
+        self.tpm_capacity = min(self.max_tpm, self.tpm_capacity + elapsed * self.max_tpm / 60.0)
+        self.last_refill = now
+
+    async def acquire(self, tokens: int):
+        # A single request larger than the whole bucket would wait forever
+        tokens = min(tokens, self.max_tpm)
+
+        # Serialize waiters so requests are admitted in FIFO order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.rpm_capacity >= 1 and self.tpm_capacity >= tokens:
+                    self.rpm_capacity -= 1
+                    self.tpm_capacity -= tokens
+                    return
+
+                wait_rpm = (1 - self.rpm_capacity) * 60.0 / self.max_rpm
+                wait_tpm = (tokens - self.tpm_capacity) * 60.0 / self.max_tpm
+                await asyncio.sleep(max(wait_rpm, wait_tpm, 0.01))
+
+
+# Completion budget per post; also counted against the TPM bucket
+MAX_COMPLETION_TOKENS = 500
+
+FALLBACK_CLASSIFICATION = {
+    "sentiment": "mixed",
+    "themes": ["fallback"],
+    "key_comments": [],
+    "insight": "Automatic classification failed; treat this post as mixed sentiment.",
+}
+
+
+NO_TEXT_CLASSIFICATION = {
+    "sentiment": "mixed",
+    "themes": ["no_text"],
+    "key_comments": [],
+    "insight": "No caption or comments were available for this post.",
+}
+
+
+def system_prompt(mode: str = "basic") -> str:
+    """
+    Per-post instructions (MODE-AWARE), shared by single and multi-post prompts.
+    """
     if mode == "basic":
-        system_msg = (
+        return (
             "You analyze ONE Instagram post.\n"
             "Return ONLY a JSON object with keys:\n"
             '{ "sentiment": "positive|mixed|negative",\n'
             '  "themes": ["short_tag1","short_tag2"] }\n'
             "Return ONLY valid JSON."
         )
-    else:
-        system_msg = (
-            "You are an assistant that reads ONE Instagram post: caption + stacked comments.\n"
-            "You must return ONLY a single JSON object with keys:\n"
-            '{ "sentiment": "positive|mixed|negative",\n'
-            '  "themes": ["short_tag1","short_tag2",...],\n'
-            '  "key_comments": ["exact short comment snippet 1","..."],\n'
-            '  "insight": "1–3 sentence operational/marketing insight based on comments" }\n'
-            "- sentiment: overall mood of the comments about the BRAND (not just emojis).\n"
-            "- key_comments: 2–4 the most informative short snippets, copy them exactly.\n"
-            "- themes: 2–5 very short tags, lower-case.\n"
-            "- insight: concise, concrete, actionable.\n"
-            "Return ONLY valid JSON."
-        )
+    return (
+        "You are an assistant that reads ONE Instagram post: caption + stacked comments.\n"
+        "You must return ONLY a single JSON object with keys:\n"
+        '{ "sentiment": "positive|mixed|negative",\n'
+        '  "themes": ["short_tag1","short_tag2",...],\n'
+        '  "key_comments": ["exact short comment snippet 1","..."],\n'
+        '  "insight": "1–3 sentence operational/marketing insight based on comments" }\n'
+        "- sentiment: overall mood of the comments about the BRAND (not just emojis).\n"
+        "- key_comments: 2–4 the most informative short snippets, copy them exactly.\n"
+        "- themes: 2–5 very short tags, lower-case.\n"
+        "- insight: concise, concrete, actionable.\n"
+        "Return ONLY valid JSON."
+    )
+
 
+def build_prompt(cleaned: str, mode: str = "basic") -> Tuple[str, str]:
+    """
+    Build the (system_msg, user_msg) pair for one cleaned post text.
+    """
     user_msg = (
         "Here is the caption + stacked comments from ONE Instagram post.\n"
         "Text:\n"
@@ -123,71 +310,451 @@ def classify_single_post(
         "------------------\n"
         "Now respond ONLY with the JSON object."
     )
+    return system_prompt(mode), user_msg
 
-    try:
-        resp = client.chat.completions.create(
-            model=model,
-            temperature=0.2,
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": user_msg},
-            ],
-        )
 
-        content = resp.choices[0].message.content
-        data = json.loads(content)
-
-        # ============================
-        # SANITIZE OUTPUT
-        # ============================
-        sentiment = str(data.get("sentiment", "mixed")).lower()
-        if sentiment not in {"positive", "mixed", "negative"}:
-            sentiment = "mixed"
-
-        themes = data.get("themes", [])
-        if not isinstance(themes, list):
-            themes = []
-
-        key_comments = data.get("key_comments", [])
-        if not isinstance(key_comments, list):
-            key_comments = []
-
-        insight = data.get("insight", "").strip()
-        if not insight:
-            insight = "No specific insight was generated."
-
-        # ============================
-        # MODE-SPECIFIC RETURN
-        # ============================
-        if mode == "basic":
-            return {
-                "sentiment": sentiment,
-                "themes": themes,
-                "key_comments": [],
-                "insight": "Upgrade to PRO for actionable insights.",
-            }
+def build_multi_prompt(cleaned_texts: List[str], mode: str = "basic") -> Tuple[str, str]:
+    """
+    Build the (system_msg, user_msg) pair for K posts in ONE request.
+    The model answers {"results": [...]} with one object per post, in order.
+    """
+    k = len(cleaned_texts)
+    system_msg = (
+        f"You will receive {k} Instagram posts, numbered Post 1 to Post {k}.\n"
+        "Apply the following instructions to EACH post independently:\n"
+        "------------------\n"
+        f"{system_prompt(mode)}\n"
+        "------------------\n"
+        f'Return ONLY a JSON object {{"results": [...]}} with exactly {k} such objects, '
+        "in the same order as the posts."
+    )
+    posts_text = "\n---\n".join(
+        f"Post {i}:\n{cleaned}" for i, cleaned in enumerate(cleaned_texts, start=1)
+    )
+    user_msg = (
+        f"Here are the captions + stacked comments of {k} Instagram posts.\n"
+        "------------------\n"
+        f"{posts_text}\n"
+        "------------------\n"
+        "Now respond ONLY with the JSON object."
+    )
+    return system_msg, user_msg
+
 
-        return {
-            "sentiment": sentiment,
-            "themes": themes,
-            "key_comments": key_comments,
-            "insight": insight,
+def post_schema(mode: str = "basic") -> Dict[str, Any]:
+    """
+    JSON schema of ONE post's classification object.
+    """
+    properties: Dict[str, Any] = {
+        "sentiment": {"type": "string", "enum": ["positive", "mixed", "negative"]},
+        "themes": {"type": "array", "items": {"type": "string"}, "maxItems": 5},
+    }
+    if mode != "basic":
+        properties["key_comments"] = {
+            "type": "array",
+            "items": {"type": "string"},
+            "maxItems": 4,
         }
+        properties["insight"] = {"type": "string"}
 
-    except Exception as e:
-        print(f"[!] Error classifying post {post.get('url','')}: {e}")
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def response_schema(mode: str = "basic", k: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Strict JSON-schema response_format for the model's answer. With
+    strict=True the API guarantees the shape, so the response needs no
+    sanitizing. With `k`, the answer is {"results": [...]} of exactly k posts.
+    """
+    schema = post_schema(mode)
+    name = f"post_classification_{mode}"
+    if k is not None:
+        schema = {
+            "type": "object",
+            "properties": {
+                "results": {"type": "array", "items": schema, "minItems": k, "maxItems": k},
+            },
+            "required": ["results"],
+            "additionalProperties": False,
+        }
+        name = f"post_classifications_{mode}"
+
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": schema},
+    }
+
+
+def build_request_body(
+    model: str,
+    system_msg: str,
+    user_msg: str,
+    mode: str = "basic",
+    k: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Chat-completions payload shared by the online and Batch API paths.
+    `k` switches to the multi-post {"results": [...]} answer.
+    """
+    return {
+        "model": model,
+        "temperature": 0.2,
+        "max_tokens": MAX_COMPLETION_TOKENS * (k or 1),
+        "response_format": response_schema(mode, k),
+        "messages": [
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": user_msg},
+        ],
+    }
+
+
+def parse_classification(content: Optional[str], mode: str = "basic") -> Dict[str, Any]:
+    """
+    Turn the model's schema-conforming JSON answer into the per-post dict.
+    Raises ValueError on an empty (refused) or truncated answer so callers
+    can fall back.
+    """
+    if not content:
+        raise ValueError("empty model response")
+    return shape_classification(json.loads(content), mode)
+
+
+def parse_multi_classification(content: Optional[str], k: int, mode: str = "basic") -> List[Dict[str, Any]]:
+    """
+    Multi-post variant of parse_classification: {"results": [...]} → k dicts.
+    """
+    if not content:
+        raise ValueError("empty model response")
+    results = json.loads(content)["results"]
+    if len(results) != k:
+        raise ValueError(f"expected {k} results, got {len(results)}")
+    return [shape_classification(data, mode) for data in results]
+
+
+def shape_classification(data: Dict[str, Any], mode: str = "basic") -> Dict[str, Any]:
+    # ============================
+    # MODE-SPECIFIC RETURN
+    # ============================
+    if mode == "basic":
         return {
-            "sentiment": "mixed",
-            "themes": ["fallback"],
+            "sentiment": data["sentiment"],
+            "themes": data["themes"],
             "key_comments": [],
-            "insight": "Automatic classification failed; treat this post as mixed sentiment.",
+            "insight": "Upgrade to PRO for actionable insights.",
         }
 
+    return {
+        "sentiment": data["sentiment"],
+        "themes": data["themes"],
+        "key_comments": data["key_comments"],
+        "insight": data["insight"],
+    }
+
+
+# Transient API errors worth retrying (429 / 5xx / network)
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+
+@retry(
+    retry=retry_if_exception_type(RETRYABLE_ERRORS),
+    wait=wait_random_exponential(multiplier=1, max=60),
+    stop=stop_after_attempt(6),
+    reraise=True,
+)
+async def create_completion_with_retry(
+    client: AsyncOpenAI,
+    sem: asyncio.Semaphore,
+    limiter: RateLimiter,
+    body: Dict[str, Any],
+    tokens: int,
+):
+    """
+    One chat-completions call with exponential backoff + jitter on transient
+    errors. The semaphore is released while backing off.
+    """
+    async with sem:
+        await limiter.acquire(tokens)
+        return await client.chat.completions.create(**body)
+
+
+async def classify_single_post_async(
+    post: Dict[str, Any],
+    client: AsyncOpenAI,
+    sem: asyncio.Semaphore,
+    limiter: RateLimiter,
+    model: str = "gpt-4o-mini",
+    mode: str = "basic",
+    conn=None,
+) -> Dict[str, Any]:
+    """
+    Call OpenAI once for a single post (bounded by `sem` and throttled by
+    `limiter`) and return a small dict:
+    {
+      "sentiment": "...",
+      "themes": [...],
+      "key_comments": [...],
+      "insight": "..."
+    }
+    Posts whose cleaned text was already classified with the same model/mode
+    are served from the SQLite cache (`conn`; None = cache disabled).
+    """
+    cleaned = post_text_for_model(post, mode)
+
+    if not cleaned:
+        return dict(NO_TEXT_CLASSIFICATION)
+
+    key = cache_key(model, mode, cleaned)
+    if conn is not None:
+        cached = load_cached_classification(conn, key)
+        if cached is not None:
+            return cached
+
+    system_msg, user_msg = build_prompt(cleaned, mode)
+
+    try:
+        resp = await create_completion_with_retry(
+            client,
+            sem,
+            limiter,
+            build_request_body(model, system_msg, user_msg, mode),
+            estimate_request_tokens(model, system_msg, user_msg, MAX_COMPLETION_TOKENS),
+        )
+        classification = parse_classification(resp.choices[0].message.content, mode)
+        if conn is not None:
+            save_cached_classification(conn, key, classification)
+        return classification
+
+    except RETRYABLE_ERRORS as e:
+        print(f"[!] Giving up on post {post.get('url','')} after retries: {e}")
+        return dict(FALLBACK_CLASSIFICATION)
+    except (BadRequestError, ValueError) as e:
+        # Rejected request or invalid JSON from the model — retrying won't help
+        print(f"[!] Error classifying post {post.get('url','')}: {e}")
+        return dict(FALLBACK_CLASSIFICATION)
+
+
+async def classify_post_chunk_async(
+    posts_chunk: List[Dict[str, Any]],
+    client: AsyncOpenAI,
+    sem: asyncio.Semaphore,
+    limiter: RateLimiter,
+    model: str = "gpt-4o-mini",
+    mode: str = "basic",
+    conn=None,
+) -> List[Dict[str, Any]]:
+    """
+    Classify K posts with ONE request (one RPM slot instead of K). Posts with
+    no text or a cache hit are answered locally and left out of the prompt.
+    Returns one dict per post, in order.
+    """
+    classifications: List[Optional[Dict[str, Any]]] = [None] * len(posts_chunk)
+    pending = []  # (index, cache key, cleaned text)
+
+    for i, post in enumerate(posts_chunk):
+        cleaned = post_text_for_model(post, mode)
+        if not cleaned:
+            classifications[i] = dict(NO_TEXT_CLASSIFICATION)
+            continue
+
+        key = cache_key(model, mode, cleaned)
+        if conn is not None:
+            cached = load_cached_classification(conn, key)
+            if cached is not None:
+                classifications[i] = cached
+                continue
+        pending.append((i, key, cleaned))
+
+    if pending:
+        k = len(pending)
+        system_msg, user_msg = build_multi_prompt([c for _, _, c in pending], mode)
+        urls = ", ".join(posts_chunk[i].get("url", "") for i, _, _ in pending)
+
+        try:
+            resp = await create_completion_with_retry(
+                client,
+                sem,
+                limiter,
+                build_request_body(model, system_msg, user_msg, mode, k=k),
+                estimate_request_tokens(model, system_msg, user_msg, MAX_COMPLETION_TOKENS * k),
+            )
+            results = parse_multi_classification(resp.choices[0].message.content, k, mode)
+            for (i, key, _), classification in zip(pending, results):
+                classifications[i] = classification
+                if conn is not None:
+                    save_cached_classification(conn, key, classification)
+
+        except RETRYABLE_ERRORS as e:
+            print(f"[!] Giving up on posts {urls} after retries: {e}")
+        except (BadRequestError, ValueError) as e:
+            print(f"[!] Error classifying posts {urls}: {e}")
+
+    return [c if c is not None else dict(FALLBACK_CLASSIFICATION) for c in classifications]
+
+
+async def classify_posts(
+    posts: List[Dict[str, Any]],
+    model: str,
+    mode: str,
+    concurrency: int,
+    max_rpm: float,
+    max_tpm: float,
+    conn=None,
+    per_request: int = 1,
+) -> List[Dict[str, Any]]:
+    """
+    Classify all posts concurrently. At most `concurrency` requests are in
+    flight at any time and request starts are throttled to max_rpm/max_tpm;
+    results are returned in the same order as `posts`. With per_request > 1,
+    each request carries that many posts.
+    """
+    # Retries are handled by create_completion_with_retry
+    client = AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+    sem = asyncio.Semaphore(max(1, concurrency))
+    limiter = RateLimiter(max_rpm=max_rpm, max_tpm=max_tpm)
+
+    if per_request > 1:
+        chunks = [posts[i:i + per_request] for i in range(0, len(posts), per_request)]
+        tasks = [
+            classify_post_chunk_async(
+                chunk, client, sem, limiter, model=model, mode=mode, conn=conn
+            )
+            for chunk in chunks
+        ]
+        chunk_results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Flatten back to one result per post
+        results = []
+        for chunk, result in zip(chunks, chunk_results):
+            if isinstance(result, BaseException):
+                results.extend([result] * len(chunk))
+            else:
+                results.extend(result)
+    else:
+        tasks = [
+            classify_single_post_async(
+                post, client, sem, limiter, model=model, mode=mode, conn=conn
+            )
+            for post in posts
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    classifications = []
+    for post, result in zip(posts, results):
+        if isinstance(result, BaseException):
+            print(f"[!] Error classifying post {post.get('url','')}: {result}")
+            result = dict(FALLBACK_CLASSIFICATION)
+        classifications.append(result)
+    return classifications
+
+
+# ================================
+# BATCH API
+# ================================
+BATCH_POLL_SECONDS = 30
+BATCH_DONE_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def classify_posts_batch(
+    posts: List[Dict[str, Any]],
+    model: str,
+    mode: str,
+    poll_seconds: float = BATCH_POLL_SECONDS,
+    conn=None,
+) -> List[Dict[str, Any]]:
+    """
+    Classify all posts through the OpenAI Batch API (/v1/batches).
+
+    All prompts are uploaded as one JSONL file and the batch is polled until it
+    finishes. Half the price of online calls and no RPM pressure, but results
+    can take up to the 24h completion window.
+    """
+    client = OpenAI(api_key=OPENAI_API_KEY)
+    classifications: List[Dict[str, Any]] = [dict(FALLBACK_CLASSIFICATION) for _ in posts]
+
+    keys: Dict[int, str] = {}
+    lines = []
+    for i, post in enumerate(posts):
+        cleaned = post_text_for_model(post, mode)
+        if not cleaned:
+            classifications[i] = dict(NO_TEXT_CLASSIFICATION)
+            continue
+
+        keys[i] = cache_key(model, mode, cleaned)
+        if conn is not None:
+            cached = load_cached_classification(conn, keys[i])
+            if cached is not None:
+                classifications[i] = cached
+                continue
+
+        system_msg, user_msg = build_prompt(cleaned, mode)
+        # custom_id is the post index: URLs are not guaranteed unique/non-empty
+        lines.append(json.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": build_request_body(model, system_msg, user_msg, mode),
+        }, ensure_ascii=False))
+
+    if not lines:
+        print("[✓] All posts served from cache — nothing to submit.")
+        return classifications
+
+    payload = ("\n".join(lines) + "\n").encode("utf-8")
+    input_file = client.files.create(file=("requests.jsonl", payload), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    print(f"[~] Submitted batch {batch.id} with {len(lines)} requests")
+
+    while batch.status not in BATCH_DONE_STATUSES:
+        time.sleep(poll_seconds)
+        batch = client.batches.retrieve(batch.id)
+        counts = batch.request_counts
+        done = f"{counts.completed}/{counts.total}" if counts else "?"
+        print(f"[~] Batch {batch.id}: {batch.status} ({done} done)")
+
+    if batch.status != "completed" or not batch.output_file_id:
+        print(f"[!] Batch {batch.id} ended with status '{batch.status}' — using fallback labels.")
+        return classifications
+
+    output = client.files.content(batch.output_file_id).text
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        i = int(item["custom_id"])
+        response = item.get("response") or {}
+        try:
+            if item.get("error") or response.get("status_code") != 200:
+                raise RuntimeError(item.get("error") or response.get("status_code"))
+            content = response["body"]["choices"][0]["message"]["content"]
+            classifications[i] = parse_classification(content, mode)
+            if conn is not None:
+                save_cached_classification(conn, keys[i], classifications[i])
+        except Exception as e:
+            print(f"[!] Error classifying post {posts[i].get('url','')}: {e}")
+
+    return classifications
+
 
 # ================================
 # MAIN
 # ================================
+def positive_float(value: str) -> float:
+    # A zero/negative rate limit would divide by zero inside RateLimiter.acquire
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be > 0, got {value}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", required=True, help="Input JSON from ig_scrape_profile_v2")
@@ -204,15 +771,48 @@ def main():
         help="Classification mode: basic (open) or pro (paid)"
     )
     parser.add_argument(
-        "--sleep",
-        type=float,
-        default=0.3,
-        help="Sleep seconds between API calls to be gentle on rate limits (default: 0.3)",
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Max number of OpenAI requests in flight at once (default: 8)",
+    )
+    parser.add_argument(
+        "--max-rpm",
+        type=positive_float,
+        default=500,
+        help="Requests-per-minute limit of your OpenAI account (default: 500)",
+    )
+    parser.add_argument(
+        "--max-tpm",
+        type=positive_float,
+        default=200_000,
+        help="Tokens-per-minute limit of your OpenAI account (default: 200000)",
+    )
+    parser.add_argument(
+        "--per-request",
+        type=int,
+        default=1,
+        help="Posts packed into one OpenAI request in online mode (default: 1; try 5-10 when RPM-bound)",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Submit all posts through the OpenAI Batch API (50%% cheaper, not real-time)",
+    )
+    parser.add_argument(
+        "--batch-threshold",
+        type=int,
+        default=50,
+        help="With --batch, use online mode anyway below this many posts (default: 50)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore and don't write the SQLite classification cache",
     )
     args = parser.parse_args()
 
-    with open(args.input, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = load_json(args.input)
 
     posts = data.get("posts", [])
     if not posts:
@@ -222,29 +822,52 @@ def main():
     total = len(posts)
     print(f"[*] Loaded {total} posts from {args.input}")
 
-    for i, post in enumerate(posts, start=1):
-        url = post.get("url", "")
-        print(f"[~] Classifying post {i}/{total}: {url}")
-
-        classification = classify_single_post(
-            post,
-            model=args.model,
-            mode=args.mode,
-        )
-
+    # One cache connection for the whole run (None = --no-cache)
+    conn = None
+    if not args.no_cache:
+        conn = open_cache_db()
+        init_cache_db(conn)
 
+    try:
+        if args.batch and total >= args.batch_threshold:
+            print(f"[~] Classifying {total} posts via Batch API...")
+            classifications = classify_posts_batch(
+                posts, model=args.model, mode=args.mode, conn=conn
+            )
+        else:
+            if args.batch:
+                print(f"[~] Only {total} posts (< --batch-threshold {args.batch_threshold}) — using online mode.")
+            print(
+                f"[~] Classifying {total} posts "
+                f"(concurrency={args.concurrency}, per_request={args.per_request})..."
+            )
+            classifications = asyncio.run(
+                classify_posts(
+                    posts,
+                    model=args.model,
+                    mode=args.mode,
+                    concurrency=args.concurrency,
+                    max_rpm=args.max_rpm,
+                    max_tpm=args.max_tpm,
+                    conn=conn,
+                    per_request=args.per_request,
+                )
+            )
+    finally:
+        # Cache writes from the whole run land in ONE commit
+        if conn is not None:
+            conn.commit()
+            conn.close()
+
+    for post, classification in zip(posts, classifications):
         # Attach to post
         post["sentiment"] = classification["sentiment"]
         post["themes"] = classification["themes"]
         post["key_comments"] = classification["key_comments"]
         post["insight"] = classification["insight"]
 
-        # Light rate-limiting
-        time.sleep(args.sleep)
-
     # Write enriched JSON
-    with open(args.output, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    dump_json(args.output, data)
 
     print(f"[✓] Saved classified JSON → {args.output}")
 
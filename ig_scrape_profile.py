@@ -20,10 +20,23 @@ import json
 import asyncio
 import argparse
 import re
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 from playwright.async_api import async_playwright
 
+try:
+    # Optional: google-re2 matches in guaranteed linear time (no backtracking)
+    import re2 as re_fast
+except ImportError:
+    re_fast = re
+
+try:
+    # Optional: libuv-based event loop, cheaper per await than the default loop
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # ===========================
 # ENV
 # ===========================
@@ -43,6 +56,10 @@ PROFILE_DIR = os.path.join(BASE_DIR, ".pw_profile")
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(PROFILE_DIR, exist_ok=True)
 
+# Touched after every verified login; a fresh one lets us skip the check
+LOGIN_SENTINEL = os.path.join(PROFILE_DIR, ".ig_last_login")
+LOGIN_CACHE_SECONDS = 4 * 3600
+
 # ===========================
 # DATABASE (SQLite)
 # ===========================
@@ -52,8 +69,21 @@ os.makedirs(DB_PATH, exist_ok=True)
 DB_FILE = os.path.join(DB_PATH, "ig_posts.db")
 
 
-def init_db():
+def open_db():
+    """
+    One connection per scrape run. WAL + synchronous=NORMAL avoid an fsync
+    on every commit.
+    """
     conn = sqlite3.connect(DB_FILE)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def init_db(conn):
+    # UNIQUE(handle, post_url) doubles as a covering index for the
+    # "WHERE handle = ?" lookup in load_known_posts (handle is its leading
+    # column), so no separate index on handle is needed.
     c = conn.cursor()
     c.execute(
         """
@@ -68,31 +98,26 @@ def init_db():
         """
     )
     conn.commit()
-    conn.close()
 
 
-def load_known_posts(handle: str):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("SELECT post_url FROM posts WHERE handle = ?", (handle,))
-    rows = c.fetchall()
-    conn.close()
-    return set(r[0] for r in rows)
+def load_known_posts(conn, handle: str) -> frozenset[str]:
+    rows = conn.execute("SELECT post_url FROM posts WHERE handle = ?", (handle,)).fetchall()
+    return frozenset(r[0] for r in rows)
 
 
-def save_post_to_db(handle: str, post_url: str, timestamp: str | None):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
+def save_posts_to_db(conn, rows: list[tuple[str, str, str | None]]):
+    """
+    Insert all (handle, post_url, timestamp) rows in a single transaction.
+    """
     try:
-        c.execute(
+        conn.executemany(
             "INSERT OR IGNORE INTO posts (handle, post_url, timestamp, added_at) "
             "VALUES (?, ?, ?, datetime('now'))",
-            (handle, post_url, timestamp),
+            rows,
         )
         conn.commit()
     except Exception as e:
         print("[DB ERROR]", e)
-    conn.close()
 
 
 # ===========================
@@ -115,13 +140,17 @@ UNWANTED_PATTERNS = [
     r"Follow [A-Za-z0-9_.]+",
 ]
 
+# All patterns in one alternation so the text is scanned once, not 14 times.
+# Inline (?i) instead of a flag: works for both re and re2.
+_UNWANTED_RE = re_fast.compile("(?i)" + "|".join(f"(?:{p})" for p in UNWANTED_PATTERNS))
+_WS_RE = re.compile(r"\s+")
+
 
 def clean_raw_text(text: str) -> str:
     if not text:
         return ""
-    for pat in UNWANTED_PATTERNS:
-        text = re.sub(pat, "", text, flags=re.IGNORECASE)
-    text = re.sub(r"\s+", " ", text)
+    text = _UNWANTED_RE.sub("", text)
+    text = _WS_RE.sub(" ", text)
     return text.strip()
 
 
@@ -129,12 +158,46 @@ def clean_raw_text(text: str) -> str:
 # LOGIN
 # ===========================
 
+def login_recently_verified() -> bool:
+    try:
+        return time.time() - os.path.getmtime(LOGIN_SENTINEL) < LOGIN_CACHE_SECONDS
+    except OSError:
+        return False
+
+
+def mark_logged_in():
+    with open(LOGIN_SENTINEL, "w", encoding="utf-8") as f:
+        f.write(datetime.now(timezone.utc).isoformat())
+
+
+def forget_login():
+    # Session is gone: make the next run do a real login check
+    try:
+        os.remove(LOGIN_SENTINEL)
+    except FileNotFoundError:
+        pass
+
+
+def landed_on_login(page) -> bool:
+    """True (and the login sentinel is dropped) if Instagram redirected `page` to the login form."""
+    if "/accounts/login" not in page.url:
+        return False
+    print("[!] Redirected to the login page — session expired.")
+    forget_login()
+    return True
+
+
 async def ensure_logged_in(page):
+    if login_recently_verified():
+        print("[✓] Login verified within the last 4h — skipping check.")
+        return True
+
     print("[*] Checking login status...")
     await page.goto("https://www.instagram.com/", wait_until="networkidle")
 
     if await page.locator("img[alt*='profile picture']").count() > 0:
         print("[✓] Already logged in.")
+        mark_logged_in()
         return True
 
     print("[~] Logging in...")
@@ -148,16 +211,37 @@ async def ensure_logged_in(page):
 
     if await page.locator("img[alt*='profile picture']").count() > 0:
         print("[✓] Login successful.")
+        mark_logged_in()
         return True
 
     print("[!] Login failed.")
+    forget_login()
     return False
 
 
+# ===========================
+# RESOURCE BLOCKING
+# ===========================
+
+# We only read DOM text — never download pixels, video, fonts or CSS
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+
+
+async def block_heavy_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
 # ===========================
 # COMMENT EXPANDER (deep)
 # ===========================
 
+# Comment rows (replies are nested lists, so this counts them too)
+COMMENT_ITEMS_JS = "document.querySelectorAll('ul li').length"
+
+
 async def expand_comments(page):
     selectors = [
         "text=View all",
@@ -173,13 +257,21 @@ async def expand_comments(page):
         found = False
         for sel in selectors:
             button = page.locator(sel).first
-            if await button.count() > 0:
-                try:
-                    await button.click()
-                    await page.wait_for_timeout(1000)
-                    found = True
-                except Exception:
-                    pass
+            try:
+                if await button.count() == 0:
+                    continue
+                prev_count = await page.evaluate(COMMENT_ITEMS_JS)
+                await button.click()
+                found = True
+            except Exception:
+                continue
+            # Continue as soon as new comments render, instead of a blind sleep
+            try:
+                await page.wait_for_function(
+                    f"n => {COMMENT_ITEMS_JS} > n", arg=prev_count, timeout=3000
+                )
+            except Exception:
+                pass
         if not found:
             break
 
@@ -188,22 +280,47 @@ async def expand_comments(page):
 # POST SCRAPER
 # ===========================
 
+CAPTION_AND_COMMENTS_JS = """
+() => {
+    const cap = document.querySelector('article h1, article [data-testid=post-caption]');
+    const comments = Array.from(document.querySelectorAll('article ul ul li'))
+        .map(li => li.innerText)
+        .filter(Boolean);
+    return {caption: cap ? cap.innerText : '', comments};
+}
+"""
+
 async def extract_post_details(page, post_url: str):
     print(f"[~] Scraping: {post_url}")
 
     # Load the post
     try:
-        await page.goto(post_url, wait_until="networkidle", timeout=80000)
+        await page.goto(post_url, wait_until="domcontentloaded", timeout=80000)
     except Exception:
         print("[!] Timeout loading post.")
         return {
             "url": post_url,
             "timestamp": None,
+            "caption": None,
             "raw_text": "",
             "type": "unknown",
         }
 
-    await page.wait_for_timeout(2000)
+    if landed_on_login(page):
+        # Tagged so it is not stored as "known" — it must be re-scraped after re-login
+        return {
+            "url": post_url,
+            "timestamp": None,
+            "caption": None,
+            "raw_text": "",
+            "type": "login_redirect",
+        }
+
+    # Wait for the post itself to render rather than sleeping a fixed 2s
+    try:
+        await page.wait_for_selector("article time", timeout=15000)
+    except Exception:
+        print("[!] Post content did not render in time — extracting what is there.")
 
     # Expand comments aggressively
     await expand_comments(page)
@@ -220,21 +337,38 @@ async def extract_post_details(page, post_url: str):
     except Exception:
         pass
 
-    # Use article-based extraction (more reliable)
+    # Pull only caption + comment nodes in one round-trip (not the whole article)
+    # The caption is also kept on its own: basic-mode classification only reads
+    # the caption, and the joined text has no marker left to cut the comments at.
+    # None = no caption node found (captionless post, selector miss, article
+    # fallback below); the classifier then uses raw_text instead.
+    caption = None
+    raw = ""
     try:
-        article = page.locator("article").first
-        if await article.count() > 0:
-            raw = await article.inner_text()
-        else:
-            raw = await page.inner_text("body")
+        payload = await page.evaluate(CAPTION_AND_COMMENTS_JS)
+        caption = payload["caption"] or None
+        raw = "\n".join([payload["caption"], *payload["comments"]]).strip()
     except Exception:
-        raw = ""
+        pass
+
+    # Fallback: article-based extraction if the targeted selectors found nothing
+    if not raw:
+        caption = None
+        try:
+            article = page.locator("article").first
+            if await article.count() > 0:
+                raw = await article.inner_text()
+            else:
+                raw = await page.inner_text("body")
+        except Exception:
+            raw = ""
 
     cleaned = clean_raw_text(raw)
 
     return {
         "url": post_url,
         "timestamp": timestamp,
+        "caption": clean_raw_text(caption) if caption is not None else None,
         "raw_text": cleaned,
         "type": post_type,
     }
@@ -244,38 +378,55 @@ async def extract_post_details(page, post_url: str):
 # SCRAPE PROFILE
 # ===========================
 
+async def collect_post_hrefs(page) -> list[str]:
+    """
+    All post/reel hrefs currently in the grid, fetched in ONE browser round-trip
+    instead of a get_attribute() call per anchor.
+    """
+    return await page.eval_on_selector_all(
+        "a[href*='/p/'], a[href*='/reel/']",
+        "els => els.map(e => e.getAttribute('href'))",
+    )
+
+
+async def launch_context(pw, headless: bool):
+    ctx = await pw.chromium.launch_persistent_context(
+        PROFILE_DIR,
+        headless=headless,
+        viewport={"width": 1400, "height": 2400},
+        args=["--disable-blink-features=AutomationControlled"],
+    )
+    # Context-wide so every page in the worker pool inherits it
+    await ctx.route("**/*", block_heavy_resources)
+    return ctx
+
+
 async def scrape_profile(
+    ctx,
     handle: str,
     max_posts: int,
-    headless: bool,
     deep: bool,
-    dry_run: bool,
+    conn=None,
+    workers: int = 4,
 ):
-    # Initialize SQLite DB
-    if dry_run:
-        print("[~] DRY-RUN mode enabled — skipping database usage.")
-        known_posts = set()
-    else:
-        init_db()
-        known_posts = load_known_posts(handle)
+    """
+    Scrape one profile inside an already logged-in browser context.
+    `conn` is the SQLite connection (None = dry-run, no DB usage).
+    """
+    if conn is not None:
+        known_posts = load_known_posts(conn, handle)
         print(f"[✓] Known posts in DB for {handle}: {len(known_posts)}")
+    else:
+        known_posts = frozenset()
 
-
-    async with async_playwright() as pw:
-        ctx = await pw.chromium.launch_persistent_context(
-            PROFILE_DIR,
-            headless=headless,
-            viewport={"width": 1400, "height": 2400},
-            args=["--disable-blink-features=AutomationControlled"],
-        )
-        page = await ctx.new_page()
-
-        if not await ensure_logged_in(page):
-            await ctx.close()
-            return None
-
+    page = await ctx.new_page()
+    pages = [page]
+    try:
         print(f"[~] Opening profile: https://www.instagram.com/{handle}/")
         await page.goto(f"https://www.instagram.com/{handle}/", wait_until="networkidle")
+        if landed_on_login(page):
+            # Not "no new posts": the grid was never shown
+            raise RuntimeError("redirected to the login page, log in again and re-run")
         await page.wait_for_timeout(3000)
 
         urls = []
@@ -291,21 +442,12 @@ async def scrape_profile(
             MAX_SCROLL_ROUNDS = 200  # safety limit
 
             for round_idx in range(MAX_SCROLL_ROUNDS):
-                anchors = await page.locator("a[href*='/p/'], a[href*='/reel/']").all()
-
-                new_in_round = 0
-                for el in anchors:
-                    href = await el.get_attribute("href")
-                    if not href:
-                        continue
-                    full_url = "https://www.instagram.com" + href
-
-                    # Skip already-known posts (from DB) and duplicates in this run
-                    if full_url in known_posts or full_url in collected:
-                        continue
+                hrefs = await collect_post_hrefs(page)
 
-                    collected.add(full_url)
-                    new_in_round += 1
+                # Skip already-known posts (from DB) and duplicates in this run
+                new = {"https://www.instagram.com" + h for h in hrefs if h} - known_posts - collected
+                collected |= new
+                new_in_round = len(new)
 
                 if new_in_round > 0:
                     print(
@@ -343,27 +485,14 @@ async def scrape_profile(
                 await page.mouse.wheel(0, 2000)
                 await page.wait_for_timeout(900)
 
-            anchors = await page.locator("a[href*='/p/'], a[href*='/reel/']").all()
-            seen = set()
-
-            for el in anchors:
-                href = await el.get_attribute("href")
-                if not href:
-                    continue
-
-                full_url = "https://www.instagram.com" + href
-
-                if full_url in seen or full_url in known_posts:
-                    continue
-
-                seen.add(full_url)
+            hrefs = await collect_post_hrefs(page)
+            seen = {"https://www.instagram.com" + h for h in hrefs if h} - known_posts
 
             urls = list(seen)
             print(f"[✓] Normal mode collected {len(urls)} candidate posts (excluding DB-known)")
 
         if not urls:
             print("[!] No new posts to scrape (all posts already in DB or profile empty).")
-            await ctx.close()
             return {
                 "handle": handle,
                 "scraped_at": datetime.utcnow().isoformat(),
@@ -371,55 +500,188 @@ async def scrape_profile(
             }
 
         # SCRAPE ALL TIMESTAMPS FIRST to sort correctly
-        post_entries = []
-        for url in urls:
-            details = await extract_post_details(page, url)
-            post_entries.append(details)
-
-            # Store in database
-            if not dry_run:
-                save_post_to_db(handle, details["url"], details["timestamp"])
-        await ctx.close()
-
-        # Remove pinned posts
-        def is_pinned(post: dict) -> bool:
-            """
-            Pinned posts often have non-standard timestamps or missing datetime.
-            We skip anything without a proper ISO timestamp ending with 'Z'.
-            """
-            ts = post["timestamp"]
-            return ts is None or not isinstance(ts, str) or not ts.endswith("Z")
-
-        filtered = [p for p in post_entries if not is_pinned(p)]
-        print(f"[✓] After removing pinned posts: {len(filtered)} remain")
-
-        # SORT NEWEST FIRST
-        def parse_timestamp(ts):
+        # Pool of K pages sharing the logged-in context; each worker borrows one
+        n_pages = max(1, min(workers, len(urls)))
+        for _ in range(n_pages - 1):
+            pages.append(await ctx.new_page())
+        page_pool = asyncio.Queue()
+        for p in pages:
+            page_pool.put_nowait(p)
+        print(f"[~] Scraping {len(urls)} posts with {n_pages} parallel pages...")
+
+        async def worker(url: str):
+            worker_page = await page_pool.get()
             try:
-                return datetime.fromisoformat(ts.replace("Z", "+00:00"))
-            except Exception:
-                return datetime.min
+                return await extract_post_details(worker_page, url)
+            finally:
+                page_pool.put_nowait(worker_page)
 
-        filtered.sort(key=lambda p: parse_timestamp(p["timestamp"]), reverse=True)
+        # One crashed/navigated-away page must not abort the whole pool (and lose
+        # every post already scraped): its URL becomes an "unknown" entry instead
+        outcomes = await asyncio.gather(*(worker(u) for u in urls), return_exceptions=True)
+        post_entries = []
+        for url, outcome in zip(urls, outcomes):
+            if isinstance(outcome, BaseException):
+                print(f"[!] Failed scraping {url}: {outcome}")
+                outcome = {
+                    "url": url,
+                    "timestamp": None,
+                    "caption": None,
+                    "raw_text": "",
+                    "type": "unknown",
+                }
+            post_entries.append(outcome)
+    finally:
+        for p in pages:
+            await p.close()
+
+    # Store in database (one transaction for the whole profile); posts that hit
+    # the login page were never seen, so they stay unknown for the next run
+    if conn is not None:
+        save_posts_to_db(
+            conn,
+            [
+                (handle, d["url"], d["timestamp"])
+                for d in post_entries
+                if d["type"] != "login_redirect"
+            ],
+        )
 
-        # Limit to newest N
-        final_posts = filtered[:max_posts]
-        print(f"[✓] Final returned posts (after limit): {len(final_posts)}")
+    # Remove pinned posts
+    def is_pinned(post: dict) -> bool:
+        """
+        Pinned posts often have non-standard timestamps or missing datetime.
+        We skip anything without a proper ISO timestamp ending with 'Z'.
+        """
+        ts = post["timestamp"]
+        return ts is None or not isinstance(ts, str) or not ts.endswith("Z")
 
-        return {
-            "handle": handle,
-            "scraped_at": datetime.utcnow().isoformat(),
-            "posts": final_posts,
-        }
+    filtered = [p for p in post_entries if not is_pinned(p)]
+    print(f"[✓] After removing pinned posts: {len(filtered)} remain")
+
+    # SORT NEWEST FIRST
+    def parse_timestamp(ts):
+        try:
+            return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+        except Exception:
+            return datetime.min
+
+    filtered.sort(key=lambda p: parse_timestamp(p["timestamp"]), reverse=True)
+
+    # Limit to newest N
+    final_posts = filtered[:max_posts]
+    print(f"[✓] Final returned posts (after limit): {len(final_posts)}")
+
+    return {
+        "handle": handle,
+        "scraped_at": datetime.utcnow().isoformat(),
+        "posts": final_posts,
+    }
+
+
+def save_profile_json(handle: str, data: dict) -> str:
+    ts = datetime.utcnow().strftime("%Y%m%d_%H%M")
+    # Create per-handle directory
+    handle_dir = os.path.join(DATA_DIR, handle)
+    os.makedirs(handle_dir, exist_ok=True)
+
+    outfile = os.path.join(handle_dir, f"{handle}_{ts}.json")
+
+    with open(outfile, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+    return outfile
+
+
+async def scrape_many(
+    handles: list[str],
+    max_posts: int,
+    headless: bool,
+    deep: bool,
+    dry_run: bool,
+    workers: int = 4,
+) -> bool:
+    """
+    Scrape several handles with ONE browser launch, ONE login check and ONE
+    DB connection; each profile's JSON is saved as soon as it is done.
+    Returns False if login failed.
+    """
+    # Initialize SQLite DB
+    if dry_run:
+        print("[~] DRY-RUN mode enabled — skipping database usage.")
+        conn = None
+    else:
+        conn = open_db()
+        init_db(conn)
+
+    try:
+        async with async_playwright() as pw:
+            ctx = await launch_context(pw, headless)
+            try:
+                page = await ctx.new_page()
+                logged_in = await ensure_logged_in(page)
+                await page.close()
+                if not logged_in:
+                    return False
+
+                for i, handle in enumerate(handles, start=1):
+                    print(f"\n[+] Profile {i}/{len(handles)}: {handle}")
+                    try:
+                        data = await scrape_profile(
+                            ctx,
+                            handle=handle,
+                            max_posts=max_posts,
+                            deep=deep,
+                            conn=conn,
+                            workers=workers,
+                        )
+                    except Exception as e:
+                        print(f"[!] Scrape failed for {handle}: {e}")
+                        continue
+
+                    outfile = save_profile_json(handle, data)
+                    print(f"[✓] Saved → {outfile}")
+            finally:
+                await ctx.close()
+    finally:
+        if conn is not None:
+            conn.close()
+
+    return True
 
 
 # ===========================
 # MAIN
 # ===========================
 
+def load_handles_file(path: str) -> list[str]:
+    """
+    One handle per line; blank lines and '#' comments are ignored.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return [line.lstrip("@") for line in lines if line]
+
+
+def run_async(coro):
+    """
+    asyncio.run(), on a uvloop loop when uvloop is installed (Python 3.11+).
+    The loop is chosen here rather than via a process-wide policy at import.
+    """
+    if uvloop is None or not hasattr(asyncio, "Runner"):
+        return asyncio.run(coro)
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        return runner.run(coro)
+
+
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--handle", required=True)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--handle")
+    target.add_argument(
+        "--handles-file",
+        help="Text file with one handle per line; all are scraped in one browser session",
+    )
     parser.add_argument("--posts", type=int, default=30)
     parser.add_argument("--login", action="store_true", help="Run browser non-headless for debugging")
     parser.add_argument(
@@ -432,35 +694,33 @@ def main():
         action="store_true",
         help="Run without using or writing to the SQLite database",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of browser pages scraping posts in parallel (default: 4)",
+    )
 
     args = parser.parse_args()
 
     headless = not args.login
+    handles = load_handles_file(args.handles_file) if args.handles_file else [args.handle]
+    if not handles:
+        print("[!] No handles to scrape.")
+        return
 
-    data = asyncio.run(
-        scrape_profile(
-            handle=args.handle,
+    ok = run_async(
+        scrape_many(
+            handles=handles,
             max_posts=args.posts,
             headless=headless,
             deep=args.deep,
             dry_run=args.dry_run,
+            workers=args.workers,
         )
     )
-    if not data:
+    if not ok:
         print("[!] Scrape failed.")
-        return
-
-    ts = datetime.utcnow().strftime("%Y%m%d_%H%M")
-    # Create per-handle directory
-    handle_dir = os.path.join(DATA_DIR, args.handle)
-    os.makedirs(handle_dir, exist_ok=True)
-
-    outfile = os.path.join(handle_dir, f"{args.handle}_{ts}.json")
-
-    with open(outfile, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-
-    print(f"[✓] Saved → {outfile}")
 
 
 if __name__ == "__main__":
@@ -38,10 +38,27 @@ import re
 import json
 import argparse
 import asyncio
+import sys
+import time
+from dataclasses import asdict, dataclass, is_dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
+from operator import attrgetter
 
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+try:
+    # Optional: much faster JSON serialization of the results
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # Optional: libuv-based event loop, cheaper per await than the default loop
+    import uvloop
+except ImportError:
+    uvloop = None
 
 # ===========================
 # ENV / PATHS
@@ -62,6 +79,10 @@ PROFILE_DIR = os.path.join(BASE_DIR, ".pw_profile")
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(PROFILE_DIR, exist_ok=True)
 
+# Touched after every verified login; a fresh one lets us skip the check
+LOGIN_SENTINEL = os.path.join(PROFILE_DIR, ".ig_last_login")
+LOGIN_CACHE_SECONDS = 4 * 3600
+
 
 # ===========================
 # CATEGORY → HASHTAGS
@@ -243,21 +264,81 @@ CATEGORY_HASHTAGS = {
 # HELPERS
 # ===========================
 
+# Compiled once at import; used for every reel's body text
+_WS_RE = re.compile(r"\s+")
+_HASHTAG_RE = re.compile(r"#\w+")
+_COUNTS_RE = re.compile(r"([\d.,]+)\s+(likes|comments)")  # run on lowercased text
+_SHORTCODE_RE = re.compile(r"/(?:reel|p)/([^/]+)/")
+_NOISE_RE = re.compile(r"Sorry, we're having trouble playing this video\.?", re.I)
+
+
+@dataclass(slots=True)
+class ReelResult:
+    """One scraped reel; converted to a plain dict only when dumped to JSON."""
+    url: str
+    shortcode: str | None
+    timestamp: str | None
+    age_hours: float
+    likes: int
+    comments: int
+    engagement_score: int
+    audio_name: str
+    caption: str
+    hashtags: list[str]
+
+
+def _json_default(obj):
+    if is_dataclass(obj):
+        return asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dump_json(path: str, data) -> None:
+    if orjson is not None:
+        # UTF-8 bytes in one write (same output as ensure_ascii=False);
+        # ReelResult dataclasses are serialized natively
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False, default=_json_default)
+
+
+if sys.version_info >= (3, 11):
+    # 3.11+ parses the trailing "Z" natively — no intermediate string copy
+    parse_iso_timestamp = datetime.fromisoformat
+else:
+    def parse_iso_timestamp(ts: str) -> datetime:
+        return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+
+
+@lru_cache(maxsize=4096)
+def _clean_cached(text: str) -> str:
+    return _WS_RE.sub(" ", _NOISE_RE.sub("", text)).strip()
+
+
 def clean_text(text: str) -> str:
     if not text:
         return ""
+    # Short strings (audio names, small captions) repeat across reels of the
+    # same trend: memoize those, clean long page bodies directly
+    if len(text) < 1024:
+        return _clean_cached(text)
     # Remove Instagram boilerplate-ish noise (light)
-    text = re.sub(r"Sorry, we're having trouble playing this video\.?", "", text, flags=re.I)
-    text = re.sub(r"\s+", " ", text)
+    text = _NOISE_RE.sub("", text)
+    text = _WS_RE.sub(" ", text)
     return text.strip()
 
 
 def extract_hashtags(caption: str) -> list[str]:
     if not caption:
         return []
-    tags = re.findall(r"#\w+", caption)
-    # Normalize to lowercase, unique
-    return sorted(set(t.lower() for t in tags))
+    # Match on the original text (lowercasing can expand characters, e.g. "İ",
+    # and split a tag), then lowercase + dedupe the matches in one pass
+    return sorted({t.lower() for t in _HASHTAG_RE.findall(caption)})
+
+
+_COUNT_MULTIPLIERS = {"k": 1_000, "m": 1_000_000}
 
 
 def parse_count(value: str) -> int | None:
@@ -266,51 +347,124 @@ def parse_count(value: str) -> int | None:
     """
     if not value:
         return None
-    v = value.strip().lower()
     # Remove commas
-    v = v.replace(",", "")
-    multiplier = 1
-    if v.endswith("k"):
-        multiplier = 1_000
-        v = v[:-1]
-    elif v.endswith("m"):
-        multiplier = 1_000_000
+    v = value.strip().lower().replace(",", "")
+    if not v:
+        return None
+
+    multiplier = _COUNT_MULTIPLIERS.get(v[-1], 1)
+    if multiplier != 1:
         v = v[:-1]
 
     try:
-        num = float(v)
-        return int(num * multiplier)
-    except Exception:
+        # Fast path: plain integer counts (the common case) skip the float round-trip
+        if "." not in v:
+            return int(v) * multiplier
+        return int(float(v) * multiplier)
+    except (ValueError, OverflowError):
         return None
 
 
+def parse_counts_batch(values: list[str]) -> list[int | None]:
+    """
+    Bulk form of parse_count for analytics over many saved trend JSONs.
+    Count strings repeat a lot ('1.2K', '3M', ...), so each distinct string
+    is parsed only once.
+    """
+    parsed: dict[str, int | None] = {}
+    out = []
+    for v in values:
+        if v not in parsed:
+            parsed[v] = parse_count(v)
+        out.append(parsed[v])
+    return out
+
+
+# We only read DOM text — never download pixels, video, fonts or CSS
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+
+
+async def block_heavy_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+PROFILE_PIC_SELECTOR = "img[alt*='profile picture']"
+
+
+def login_recently_verified() -> bool:
+    try:
+        return time.time() - os.path.getmtime(LOGIN_SENTINEL) < LOGIN_CACHE_SECONDS
+    except OSError:
+        return False
+
+
+def mark_logged_in():
+    with open(LOGIN_SENTINEL, "w", encoding="utf-8") as f:
+        f.write(datetime.now(timezone.utc).isoformat())
+
+
+def forget_login():
+    # Session is gone: make the next run do a real login check
+    try:
+        os.remove(LOGIN_SENTINEL)
+    except FileNotFoundError:
+        pass
+
+
+def landed_on_login(page) -> bool:
+    """True (and the login sentinel is dropped) if Instagram redirected `page` to the login form."""
+    if "/accounts/login" not in page.url:
+        return False
+    print("[!] Redirected to the login page — session expired.")
+    forget_login()
+    return True
+
+
 async def ensure_logged_in(page):
+    if login_recently_verified():
+        print("[✓] Login verified within the last 4h — skipping check.")
+        return True
+
     print("[*] Checking login status (trends scraper)...")
-    await page.goto("https://www.instagram.com/", wait_until="networkidle")
-    await page.wait_for_timeout(2000)
+    await page.goto("https://www.instagram.com/", wait_until="domcontentloaded")
 
-    # Heuristic: profile avatar present => logged in
-    if await page.locator("img[alt*='profile picture']").count() > 0:
+    # Heuristic: profile avatar present => logged in (returns as soon as it renders)
+    try:
+        await page.wait_for_selector(PROFILE_PIC_SELECTOR, timeout=8000)
         print("[✓] Already logged in.")
+        mark_logged_in()
         return True
+    except PlaywrightTimeoutError:
+        pass
 
     print("[~] Logging in...")
-    await page.goto("https://www.instagram.com/accounts/login/", wait_until="networkidle")
-    await page.wait_for_timeout(2000)
+    await page.goto("https://www.instagram.com/accounts/login/", wait_until="domcontentloaded")
+    await page.wait_for_selector("input[name='username']", timeout=10000)
 
     await page.fill("input[name='username']", IG_USERNAME)
     await page.fill("input[name='password']", IG_PASSWORD)
     await page.click("button[type='submit']")
-    await page.wait_for_timeout(6000)
 
-    if await page.locator("img[alt*='profile picture']").count() > 0:
+    try:
+        await page.wait_for_selector(PROFILE_PIC_SELECTOR, timeout=15000)
         print("[✓] Login successful.")
+        mark_logged_in()
         return True
+    except PlaywrightTimeoutError:
+        pass
 
     print("[!] Login failed.")
+    forget_login()
     return False
 
 
+# Comment rows (replies are nested lists, so this counts them too)
+COMMENT_ITEMS_JS = "document.querySelectorAll('ul li').length"
+
+
 async def expand_comments_light(page):
     """
     Light comment expansion — we just want enough text to detect high engagement.
@@ -326,44 +480,77 @@ async def expand_comments_light(page):
         found = False
         for sel in selectors:
             btn = page.locator(sel).first
-            if await btn.count() > 0:
-                try:
-                    await btn.click()
-                    await page.wait_for_timeout(800)
-                    found = True
-                except Exception:
-                    pass
+            try:
+                if await btn.count() == 0:
+                    continue
+                prev_count = await page.evaluate(COMMENT_ITEMS_JS)
+                await btn.click()
+                found = True
+            except Exception:
+                continue
+            # Continue as soon as new comments render (capped at the old 800ms)
+            try:
+                await page.wait_for_function(
+                    f"n => {COMMENT_ITEMS_JS} > n", arg=prev_count, timeout=800
+                )
+            except Exception:
+                pass
         if not found:
             break
 
 
-async def extract_reel_details(page, url: str, max_hours: int):
+# One evaluate per phase instead of a locator().count() probe per element:
+# each probe is its own round-trip to the browser.
+REEL_META_JS = """() => {
+    const timeEl = document.querySelector('time');
+    return {
+        timestamp: timeEl ? timeEl.getAttribute('datetime') : null,
+        has_video: !!document.querySelector('video'),
+    };
+}"""
+
+REEL_TEXT_JS = """() => {
+    const article = document.querySelector('article');
+    const audio = document.querySelector("a[href*='/audio/']");
+    return {
+        article_text: article ? article.innerText : '',
+        audio_name: audio ? audio.innerText : '',
+    };
+}"""
+
+
+async def extract_reel_details(page, url: str, max_hours: int, now: datetime | None = None):
     """
     Extracts details from a single REEL page.
-    Skips if older than max_hours.
+    Skips if older than max_hours (relative to `now`, default: current UTC time).
     """
     print(f"[~] Scraping reel: {url}")
     try:
-        await page.goto(url, wait_until="networkidle", timeout=80000)
+        await page.goto(url, wait_until="domcontentloaded", timeout=80000)
     except Exception:
         print("[!] Timeout loading reel.")
         return None
+    if landed_on_login(page):
+        return None
 
-    await page.wait_for_timeout(2000)
-
-    # Try to expand some comments (light)
-    await expand_comments_light(page)
+    # Wait for the reel itself to render rather than sleeping a fixed 2s
+    try:
+        await page.wait_for_selector("time, article", timeout=10000)
+    except Exception:
+        pass
 
     # ---------------- Timestamp & age ----------------
     timestamp_iso = None
     age_hours = None
+    has_video = False
     try:
-        ts = await page.locator("time").first.get_attribute("datetime")
+        meta = await page.evaluate(REEL_META_JS)
+        has_video = bool(meta.get("has_video"))
+        ts = meta.get("timestamp")
         if ts:
             timestamp_iso = ts
-            dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-            now = datetime.now(timezone.utc)
-            delta = now - dt
+            dt = parse_iso_timestamp(ts)
+            delta = (now or datetime.now(timezone.utc)) - dt
             age_hours = delta.total_seconds() / 3600.0
     except Exception:
         pass
@@ -377,25 +564,47 @@ async def extract_reel_details(page, url: str, max_hours: int):
         print(f"   [!] Reel is too old ({age_hours:.1f}h > {max_hours}h) — skipping.")
         return None
 
-    # ---------------- Page text for counts ----------------
+    # /p/ URLs are often plain photo posts: no video => no audio to look up and
+    # no need to expand comments (the counts come from the "N likes" text)
+    is_reel = "/reel/" in url or has_video
+
+    # Try to expand some comments (light) — only for reels that passed the age filter
+    if is_reel:
+        await expand_comments_light(page)
+
+    # ---------------- Page text (article first) + audio ----------------
+    # The article holds the caption and the counts; serializing the whole body
+    # (nav, sidebar, suggested reels) is only a fallback. Read after the
+    # comment expansion so the expanded text is included.
+    body_text = ""
+    audio_raw = ""
     try:
-        body_text = await page.inner_text("body")
+        data = await page.evaluate(REEL_TEXT_JS)
+        body_text = data.get("article_text") or ""
+        audio_raw = data.get("audio_name") or ""
     except Exception:
-        body_text = ""
+        pass
+    if not body_text:
+        try:
+            body_text = await page.inner_text("body")
+        except Exception:
+            body_text = ""
 
     body_text_clean = clean_text(body_text)
 
-    # Likes
+    # Likes + comments in ONE scan: first "N likes" and first "N comments" win
     likes = None
-    m_like = re.search(r"([\d.,]+)\s+likes", body_text_clean, flags=re.I)
-    if m_like:
-        likes = parse_count(m_like.group(1))
-
-    # Comments
     comments = None
-    m_com = re.search(r"([\d.,]+)\s+comments", body_text_clean, flags=re.I)
-    if m_com:
-        comments = parse_count(m_com.group(1))
+    # One C-level lower() beats per-character case folding inside the regex
+    body_text_lower = body_text_clean.lower()
+    for m in _COUNTS_RE.finditer(body_text_lower):
+        if m.group(2) == "likes":
+            if likes is None:
+                likes = parse_count(m.group(1))
+        elif comments is None:
+            comments = parse_count(m.group(1))
+        if likes is not None and comments is not None:
+            break
 
     if likes is None:
         likes = 0
@@ -403,27 +612,11 @@ async def extract_reel_details(page, url: str, max_hours: int):
         comments = 0
 
     # ---------------- Caption ----------------
-    caption = ""
-    try:
-        article = page.locator("article").first
-        if await article.count() > 0:
-            raw = await article.inner_text()
-        else:
-            raw = body_text
-        caption = clean_text(raw)
-    except Exception:
-        caption = clean_text(body_text)
+    caption = body_text_clean
 
     # ---------------- Audio Name ----------------
-    audio_name = ""
-    try:
-        # Typical: <a href="/audio/...">Audio name</a>
-        audio_link = page.locator("a[href*='/audio/']").first
-        if await audio_link.count() > 0:
-            audio_name = await audio_link.inner_text()
-            audio_name = clean_text(audio_name)
-    except Exception:
-        audio_name = ""
+    # Typical: <a href="/audio/...">Audio name</a> — photo posts have none
+    audio_name = clean_text(audio_raw) if is_reel and audio_raw else ""
 
     # ---------------- Hashtags ----------------
     hashtags = extract_hashtags(caption)
@@ -432,26 +625,78 @@ async def extract_reel_details(page, url: str, max_hours: int):
 
     # Shortcode
     shortcode = None
-    m_sc = re.search(r"/reel/([^/]+)/", url) or re.search(r"/p/([^/]+)/", url)
+    m_sc = _SHORTCODE_RE.search(url)
     if m_sc:
         shortcode = m_sc.group(1)
 
 
-    return {
-        "url": url,
-        "shortcode": shortcode,
-        "timestamp": timestamp_iso,
-        "age_hours": round(age_hours, 2),
-        "likes": likes,
-        "comments": comments,
-        "engagement_score": engagement_score,
-        "audio_name": audio_name,
-        "caption": caption,
-        "hashtags": hashtags,
-    }
-
-
-async def scrape_trends(category: str, max_reels: int, max_hours: int, headless: bool):
+    return ReelResult(
+        url=url,
+        shortcode=shortcode,
+        timestamp=timestamp_iso,
+        age_hours=round(age_hours, 2),
+        likes=likes,
+        comments=comments,
+        engagement_score=engagement_score,
+        audio_name=audio_name,
+        caption=caption,
+        hashtags=hashtags,
+    )
+
+
+GRID_LINK_SELECTOR = "a[role='link'][href*='/reel/'], a[role='link'][href*='/p/']"
+GRID_LINKS_JS = f'document.querySelectorAll("{GRID_LINK_SELECTOR}").length'
+
+
+async def collect_hashtag_hrefs(page, tag: str) -> list[str]:
+    """
+    Open /explore/tags/<tag>/, scroll a bit and return the grid hrefs
+    (reels AND posts). Returns [] if the page fails to load.
+    """
+    tag_url = f"https://www.instagram.com/explore/tags/{tag}/"
+    print(f"\n[~] Visiting hashtag: #{tag} -> {tag_url}")
+    try:
+        await page.goto(tag_url, wait_until="domcontentloaded", timeout=60000)
+    except Exception:
+        print(f"[!] Timeout loading hashtag #{tag}, skipping.")
+        return []
+    if landed_on_login(page):
+        return []
+
+    # Wait for grid links to appear (posts or reels)
+    try:
+        await page.wait_for_selector(GRID_LINK_SELECTOR, timeout=10000)
+    except Exception:
+        print(f"   [!] No grid links visible yet for #{tag} (after initial load).")
+
+    # Scroll a bit to load more content (focus on 'top' + some 'recent')
+    # Each round continues as soon as new grid links appear (max 900ms)
+    for _ in range(8):
+        prev_count = await page.evaluate(GRID_LINKS_JS)
+        await page.mouse.wheel(0, 2200)
+        try:
+            await page.wait_for_function(
+                f"n => {GRID_LINKS_JS} > n", arg=prev_count, timeout=900
+            )
+        except Exception:
+            pass
+
+    # Collect BOTH reels and posts as candidates
+    # All hrefs in ONE browser round-trip instead of one get_attribute() per anchor
+    hrefs = await page.eval_on_selector_all(
+        GRID_LINK_SELECTOR, "els => els.map(e => e.getAttribute('href'))"
+    )
+    print(f"   [~] Found {len(hrefs)} grid anchors under #{tag}")
+    return hrefs
+
+
+async def scrape_trends(
+    category: str,
+    max_reels: int,
+    max_hours: int,
+    headless: bool,
+    workers: int = 4,
+):
     """
     Main trends scraper:
       - Picks hashtags from CATEGORY_HASHTAGS
@@ -478,68 +723,85 @@ async def scrape_trends(category: str, max_reels: int, max_hours: int, headless:
             viewport={"width": 1400, "height": 2400},
             args=["--disable-blink-features=AutomationControlled"],
         )
+        # Context-wide so every page in the worker pool inherits it
+        await ctx.route("**/*", block_heavy_resources)
         page = await ctx.new_page()
 
         if not await ensure_logged_in(page):
             await ctx.close()
             return None
 
-        candidate_urls = set()
+        # shortcode -> first URL seen; the same reel shows up under several
+        # hashtags with slightly different hrefs
+        candidates_by_sc: dict[str, str] = {}
 
         # -----------------------------
         # Round 1: collect candidate /reel/ URLs from each hashtag
+        # (up to K hashtag pages open at once)
         # -----------------------------
-        for tag in hashtags:
-            tag_url = f"https://www.instagram.com/explore/tags/{tag}/"
-            print(f"\n[~] Visiting hashtag: #{tag} -> {tag_url}")
-            try:
-                await page.goto(tag_url, wait_until="networkidle", timeout=60000)
-            except Exception:
-                print(f"[!] Timeout loading hashtag #{tag}, skipping.")
-                continue
-
-            await page.wait_for_timeout(3000)
-
-            # Scroll a bit to load more content (focus on "top" + a bit of "recent")
-            # Wait for grid links to appear (posts or reels)
-            try:
-                await page.wait_for_selector(
-                    "a[role='link'][href*='/reel/'], a[role='link'][href*='/p/']",
-                    timeout=10000,
-                )
-            except Exception:
-                print(f"   [!] No grid links visible yet for #{tag} (after initial load).")
+        tag_sem = asyncio.Semaphore(max(1, workers))
 
-            # Scroll a bit to load more content (focus on 'top' + some 'recent')
-            for _ in range(8):
-                await page.mouse.wheel(0, 2200)
-                await page.wait_for_timeout(900)
-
-            # Collect BOTH reels and posts as candidates
-            anchors = await page.locator(
-                "a[role='link'][href*='/reel/'], a[role='link'][href*='/p/']"
-            ).all()
-            print(f"   [~] Found {len(anchors)} grid anchors under #{tag}")
-
-            for el in anchors:
-                href = await el.get_attribute("href")
+        async def collect_tag(tag: str) -> list[str]:
+            # One failing hashtag (e.g. a login/challenge redirect mid-scroll)
+            # must not throw away the hrefs collected from the others
+            async with tag_sem:
+                tag_page = await ctx.new_page()
+                try:
+                    return await collect_hashtag_hrefs(tag_page, tag)
+                except Exception as e:
+                    print(f"[!] Failed collecting hashtag #{tag}: {e} — skipping.")
+                    landed_on_login(tag_page)
+                    return []
+                finally:
+                    await tag_page.close()
+
+        tag_hrefs = await asyncio.gather(*(collect_tag(t) for t in hashtags))
+
+        # Merge in hashtag order so the kept URL per shortcode is deterministic
+        for hrefs in tag_hrefs:
+            for href in hrefs:
                 if not href:
                     continue
-                full_url = "https://www.instagram.com" + href
-                candidate_urls.add(full_url)
-
+                m_sc = _SHORTCODE_RE.search(href)
+                key = m_sc.group(1) if m_sc else href
+                candidates_by_sc.setdefault(key, "https://www.instagram.com" + href)
 
+        # /reel/ URLs first so the worker pool starts on actual reels
+        candidate_urls = sorted(candidates_by_sc.values(), key=lambda u: "/reel/" not in u)
         print(f"\n[✓] Total candidate REEL URLs collected (before per-reel filtering): {len(candidate_urls)}")
 
         # -----------------------------
         # Round 2: open each reel, extract metrics, filter by recency
         # -----------------------------
+        # One reference time for every reel's age (hour resolution is plenty)
+        scrape_now = datetime.now(timezone.utc)
+
+        # Pool of K pages sharing the logged-in context; each worker borrows one
+        n_pages = max(1, min(workers, len(candidate_urls)))
+        page_pool = asyncio.Queue()
+        page_pool.put_nowait(page)
+        for _ in range(n_pages - 1):
+            page_pool.put_nowait(await ctx.new_page())
+        print(f"[~] Scraping {len(candidate_urls)} candidates with {n_pages} parallel pages...")
+
+        async def worker(url: str):
+            worker_page = await page_pool.get()
+            try:
+                return await extract_reel_details(worker_page, url, max_hours, now=scrape_now)
+            finally:
+                page_pool.put_nowait(worker_page)
+
+        # One crashed/navigated-away page must not discard the whole round:
+        # a failed URL counts as skipped (None), like a reel that fails to load
+        all_details = await asyncio.gather(
+            *(worker(u) for u in candidate_urls), return_exceptions=True
+        )
         results = []
-        for url in candidate_urls:
-            details = await extract_reel_details(page, url, max_hours)
-            if not details:
-                continue
-            results.append(details)
+        for url, d in zip(candidate_urls, all_details):
+            if isinstance(d, BaseException):
+                print(f"[!] Failed scraping {url}: {d}")
+            elif d:
+                results.append(d)
 
         await ctx.close()
 
@@ -555,7 +817,7 @@ async def scrape_trends(category: str, max_reels: int, max_hours: int, headless:
             }
 
         # Sort by engagement_score DESC
-        results.sort(key=lambda r: r.get("engagement_score", 0), reverse=True)
+        results.sort(key=attrgetter("engagement_score"), reverse=True)
 
         # Keep top N
         final_reels = results[:max_reels]
@@ -575,6 +837,17 @@ async def scrape_trends(category: str, max_reels: int, max_hours: int, headless:
 # MAIN
 # ===========================
 
+def run_async(coro):
+    """
+    asyncio.run(), on a uvloop loop when uvloop is installed (Python 3.11+).
+    The loop is chosen here rather than via a process-wide policy at import.
+    """
+    if uvloop is None or not hasattr(asyncio, "Runner"):
+        return asyncio.run(coro)
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        return runner.run(coro)
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--category", required=True, help="Business category (restaurant, gym, cafe, ...)")
@@ -585,16 +858,23 @@ def main():
         action="store_true",
         help="Run browser non-headless for debugging (show window).",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of browser pages open in parallel, for both hashtag pages and reels (default: 4)",
+    )
     args = parser.parse_args()
 
     headless = not args.login
 
-    data = asyncio.run(
+    data = run_async(
         scrape_trends(
             category=args.category,
             max_reels=args.max_reels,
             max_hours=args.max_hours,
             headless=headless,
+            workers=args.workers,
         )
     )
 
@@ -610,8 +890,7 @@ def main():
 
     outfile = os.path.join(category_dir, f"trends_{args.category}_{ts}.json")
 
-    with open(outfile, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    dump_json(outfile, data)
 
     print(f"[✓] Saved trends JSON → {outfile}")
 